@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -14,6 +15,82 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def ensure_indexes(bind=engine, tables=None):
+    """
+    Create indexes declared on models that are missing from an existing database.
+    create_all() only creates indexes together with new tables.
+    """
+    for table in tables or Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+def ensure_columns(bind=engine, tables=None):
+    """
+    Add columns declared on models that are missing from an existing database.
+    New columns need a server_default (or must be nullable) for existing rows.
+    """
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in tables or Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(bind)}"
+                    )
+
+def ensure_autoincrement(bind, table, id_columns=()):
+    """
+    Rebuild an existing SQLite table as AUTOINCREMENT if it was created without it.
+    
+    Plain INTEGER primary keys reuse the highest id once that row is deleted.
+    The id sequence is seeded with the largest id in the table and in
+    id_columns (other tables holding copies of its ids, as "table.column"),
+    so ids that moved elsewhere are not handed out again.
+    """
+    name = table.name
+    raw = bind.raw_connection()
+    try:
+        conn = raw.driver_connection
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        if row is None or "AUTOINCREMENT" in row[0].upper():
+            return
+        
+        existing_indexes = [
+            index_name for (index_name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (name,)
+            )
+        ]
+        columns = ", ".join(column.name for column in table.columns)
+        seeds = [f"SELECT MAX({table.primary_key.columns.values()[0].name}) FROM {name}"]
+        seeds += [f"SELECT MAX({ref.split('.')[1]}) FROM {ref.split('.')[0]}" for ref in id_columns]
+        statements = [f"DROP INDEX {index_name}" for index_name in existing_indexes]
+        statements += [
+            f"ALTER TABLE {name} RENAME TO {name}_old",
+            str(CreateTable(table).compile(bind)).strip(),
+        ]
+        statements += [str(CreateIndex(index).compile(bind)).strip() for index in table.indexes]
+        statements += [
+            f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {name}_old",
+            f"DROP TABLE {name}_old",
+            f"DELETE FROM sqlite_sequence WHERE name = '{name}'",
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{name}', MAX(0, {', '.join(f'COALESCE(({seed}), 0)' for seed in seeds)})",
+        ]
+        # executescript runs outside the driver's implicit transactions,
+        # so BEGIN/COMMIT makes the rebuild all-or-nothing
+        try:
+            conn.executescript("BEGIN;\n" + ";\n".join(statements) + ";\nCOMMIT;")
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+    finally:
+        raw.close()
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
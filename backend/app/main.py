@@ -1,10 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.database import engine, Base, ensure_columns, ensure_indexes
 from app.routers import tasks, ai, auth
+from app.sharding import shard_router
+from app.services.write_batcher import stop_write_batchers
+from app.services.archive_service import ARCHIVE_ENABLED, archive_worker
 
-# Create database tables
+# Create database tables (main database, then task tables on every shard)
 Base.metadata.create_all(bind=engine)
+ensure_columns()
+ensure_indexes()
+shard_router.create_all()
+shard_router.backfill_directory()
+shard_router.validate_directory()
 
 app = FastAPI(
     title="Task Management System with AI",
@@ -21,6 +29,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def start_archive_worker():
+    """Start moving old Completed tasks to the archive in the background."""
+    if ARCHIVE_ENABLED:
+        archive_worker.start()
+
+@app.on_event("shutdown")
+def flush_write_batcher():
+    """Commit any queued group-commit writes before exiting."""
+    stop_write_batchers()
+
+@app.on_event("shutdown")
+def stop_archive_worker():
+    archive_worker.stop()
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
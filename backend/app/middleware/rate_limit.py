@@ -0,0 +1,252 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from dotenv import load_dotenv
+from app.models import User
+from app.middleware.auth import get_current_user
+
+load_dotenv()
+
+# Rate limit configuration
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | sqlite
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "./ratelimit.db")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket policy: refills per_minute tokens per minute, holds at most burst."""
+    per_minute: float
+    burst: int
+
+    @property
+    def refill_rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+def _policy_from_env(name: str, per_minute: float, burst: int) -> RateLimit:
+    return RateLimit(
+        per_minute=float(os.getenv(f"RATE_LIMIT_{name}_PER_MINUTE", per_minute)),
+        burst=int(os.getenv(f"RATE_LIMIT_{name}_BURST", burst))
+    )
+
+
+# Per-route budgets (AI is expensive, CRUD is cheap)
+RATE_LIMITS: Dict[str, RateLimit] = {
+    "ai": _policy_from_env("AI", 10, 5),
+    "tasks": _policy_from_env("TASKS", 120, 30),
+}
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets. Subclasses must be safe for concurrent use."""
+
+    @abstractmethod
+    def consume(self, key: str, policy: RateLimit, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Take cost tokens from the bucket at key.
+        Returns (allowed, retry_after_seconds).
+        """
+
+    @staticmethod
+    def _refill(tokens: float, updated: float, now: float, policy: RateLimit) -> float:
+        return min(float(policy.burst), tokens + (now - updated) * policy.refill_rate)
+
+    @staticmethod
+    def _retry_after(tokens: float, cost: float, policy: RateLimit) -> float:
+        if policy.refill_rate <= 0:
+            return 60.0
+        return (cost - tokens) / policy.refill_rate
+
+
+class InMemoryBackend(RateLimitBackend):
+    """
+    Per-process buckets. Each worker process enforces its own limits.
+    Buckets that have refilled completely are dropped every sweep_interval
+    seconds; a missing bucket is treated as full, so this changes nothing.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[str, Tuple[float, float, RateLimit]] = {}
+        self._last_sweep = time.time()
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float) -> None:
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if self._refill(bucket[0], bucket[1], now, bucket[2]) < bucket[2].burst
+        }
+        self._last_sweep = now
+
+    def consume(self, key: str, policy: RateLimit, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            tokens, updated, _ = self._buckets.get(key, (float(policy.burst), now, policy))
+            tokens = self._refill(tokens, updated, now, policy)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now, policy)
+                return True, 0.0
+            self._buckets[key] = (tokens, now, policy)
+            return False, self._retry_after(tokens, cost, policy)
+
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    Buckets stored in a local SQLite file so several worker processes on
+    the same host share one set of limits (a local stand-in for Redis).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key: str, policy: RateLimit, cost: float = 1.0) -> Tuple[bool, float]:
+        conn = self._connection()
+        now = time.time()
+        # BEGIN IMMEDIATE takes the write lock up front so read-modify-write is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (float(policy.burst), now)
+            tokens = self._refill(tokens, updated, now, policy)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, (0.0 if allowed else self._retry_after(tokens, cost, policy))
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND) -> RateLimitBackend:
+    """Build the configured limiter backend."""
+    if name == "memory":
+        return InMemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend(RATE_LIMIT_DB_PATH)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {name}")
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: RateLimitBackend) -> None:
+    """Swap the limiter backend (e.g. to share limits through another store)."""
+    global _backend
+    _backend = backend
+
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def rate_limit(route: str):
+    """
+    Dependency factory enforcing the RATE_LIMITS[route] budget per authenticated user.
+
+    Usage: dependencies=[Depends(rate_limit("ai"))]
+    """
+    policy = RATE_LIMITS[route]
+
+    def dependency(current_user: User = Depends(get_current_user)) -> None:
+        if not RATE_LIMIT_ENABLED:
+            return
+        allowed, retry_after = get_backend().consume(f"{route}:{current_user.id}", policy)
+        if not allowed:
+            raise _too_many_requests("Rate limit exceeded. Please slow down.", retry_after)
+
+    return dependency
+
+
+class ConcurrencyLimiter:
+    """
+    Global in-process cap on concurrent requests with a short bounded wait queue.
+
+    Up to max_concurrent requests run at once; up to max_queue more wait at most
+    queue_timeout seconds for a slot. Anything beyond that is rejected with 429.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def __call__(self):
+        if not RATE_LIMIT_ENABLED:
+            yield
+            return
+
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            if self._waiting >= self.max_queue:
+                raise _too_many_requests("Server busy. Please retry shortly.", self.queue_timeout)
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise _too_many_requests("Server busy. Please retry shortly.", self.queue_timeout)
+            finally:
+                self._waiting -= 1
+        else:
+            await semaphore.acquire()
+
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+ai_concurrency = ConcurrencyLimiter(
+    max_concurrent=int(os.getenv("AI_MAX_CONCURRENCY", "4")),
+    max_queue=int(os.getenv("AI_QUEUE_SIZE", "8")),
+    queue_timeout=float(os.getenv("AI_QUEUE_TIMEOUT_SECONDS", "2"))
+)
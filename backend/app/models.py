@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -14,6 +14,19 @@ class User(Base):
     
     tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan")
 
+class UserShard(Base):
+    """
+    Shard directory: which task database holds a user's tasks.
+    Lives in the main database next to users; see app/sharding.py.
+    """
+    __tablename__ = "user_shards"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    shard_id = Column(Integer, nullable=False, index=True)
+    assigned_at = Column(DateTime, default=datetime.utcnow)
+    # Set while move_user() copies the user's tasks; task writes are refused meanwhile
+    moving = Column(Boolean, nullable=False, default=False, server_default="0")
+
 class Task(Base):
     __tablename__ = "tasks"
     
@@ -26,3 +39,33 @@ class Task(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     owner = relationship("User", back_populates="tasks")
+    
+    __table_args__ = (
+        # Archive sweep: Completed tasks ordered by age
+        Index("ix_tasks_state_updated_at", "state", "updated_at"),
+        # Task queries: owner + state set + updated range / sort
+        Index("ix_tasks_owner_state_updated_at", "owner_id", "state", "updated_at"),
+        # Task queries: owner + created range / default sort
+        Index("ix_tasks_owner_created_at", "owner_id", "created_at"),
+        # Never reuse ids: archived tasks keep their original id
+        {"sqlite_autoincrement": True},
+    )
+
+class ArchivedTask(Base):
+    """
+    Cold storage for Completed tasks moved out of the hot tasks table.
+    Completed is a terminal state, so archived rows are never transitioned again.
+    `id` keeps the original task id (tasks uses AUTOINCREMENT, so it is never
+    handed out again); archive_id is the archive table's own key.
+    """
+    __tablename__ = "archived_tasks"
+    
+    archive_id = Column(Integer, primary_key=True)
+    id = Column(Integer, nullable=False, index=True)
+    title = Column(String, nullable=False)
+    description = Column(String, default="")
+    state = Column(String, nullable=False)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
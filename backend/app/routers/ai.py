@@ -1,18 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.sharding import get_shard_db
 from app.models import User
-from app.schemas import AICommand, AIResponse, TaskCreate, TaskUpdate
+from app.schemas import AICommand, AIResponse, TaskCreate, TaskUpdate, TaskQuery
 from app.services.ai_service import AIService
 from app.services.task_service import TaskService
+from app.services.archive_service import ArchiveService
 from app.middleware.auth import get_current_user
+from app.middleware.rate_limit import rate_limit, ai_concurrency
 
 router = APIRouter()
 
-@router.post("/command", response_model=AIResponse)
+@router.get("/metrics")
+def get_ai_metrics(current_user: User = Depends(get_current_user)):
+    """Circuit breaker state, retry/hedge counters and latency for Gemini calls."""
+    return AIService.metrics()
+
+@router.post(
+    "/command",
+    response_model=AIResponse,
+    dependencies=[Depends(rate_limit("ai")), Depends(ai_concurrency)]
+)
 def process_ai_command(
     command: AICommand,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_shard_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -25,17 +36,27 @@ def process_ai_command(
     # Step 1: Interpret command using AI (untrusted input layer)
     intent = AIService.interpret_command(command.command)
     
+    # Step 2: Execute action through TaskService (trusted business logic)
+    return execute_intent(intent, db, current_user)
+
+def execute_intent(intent: dict, db: Session, current_user: User) -> dict:
+    """
+    Dispatch an interpreted intent to TaskService.
+    Kept separate from the endpoint so the offline replay harness can time it.
+    """
     if intent.get("action") == "ERROR":
+        data = None
+        if intent.get("degraded"):
+            data = {"degraded": True, "retry_after": intent.get("retry_after")}
         return AIService.format_response(
             success=False,
-            message=intent.get("message", "Failed to interpret command")
+            message=intent.get("message", "Failed to interpret command"),
+            data=data
         )
     
     action = intent.get("action")
     
     try:
-        # Step 2: Execute action through TaskService (trusted business logic)
-        
         if action == "CREATE":
             # Create new task
             title = intent.get("title", "").strip()
@@ -99,14 +120,26 @@ def process_ai_command(
             )
         
         elif action == "VIEW":
-            # View tasks
-            filter_state = intent.get("filter_state")
+            # View tasks (same server-side filters as GET /api/tasks)
+            filter_states = intent.get("filter_states") or (
+                [intent["filter_state"]] if intent.get("filter_state") else None
+            )
+            query = TaskQuery(
+                states=filter_states,
+                search=intent.get("search"),
+                created_after=intent.get("created_after"),
+                created_before=intent.get("created_before"),
+                updated_after=intent.get("updated_after"),
+                updated_before=intent.get("updated_before"),
+                sort_by=intent.get("sort_by") or "created_at",
+                order=intent.get("order") or "desc"
+            )
+            tasks = TaskService.query_tasks(db, query, current_user.id)
             
-            if filter_state:
-                tasks = TaskService.get_tasks_by_state(db, filter_state, current_user.id)
-                message = f"Found {len(tasks)} task(s) in '{filter_state}' state"
+            if filter_states:
+                states_text = "' or '".join(filter_states)
+                message = f"Found {len(tasks)} task(s) in '{states_text}' state"
             else:
-                tasks = TaskService.get_all_tasks(db, current_user.id)
                 message = f"Found {len(tasks)} total task(s)"
             
             tasks_data = [
@@ -132,6 +165,12 @@ def process_ai_command(
                 )
             
             tasks = TaskService.find_tasks_by_title(db, task_identifier, current_user.id)
+            archived = False
+            
+            if not tasks:
+                # Fall back to Completed tasks that have been archived
+                tasks = ArchiveService.find_archived_tasks_by_title(db, task_identifier, current_user.id)
+                archived = True
             
             if not tasks:
                 return AIService.format_response(
@@ -147,7 +186,10 @@ def process_ai_command(
                 )
             
             task = tasks[0]
-            TaskService.delete_task(db, task.id, current_user.id)
+            if archived:
+                ArchiveService.delete_archived_task(db, task.id, current_user.id)
+            else:
+                TaskService.delete_task(db, task.id, current_user.id)
             
             return AIService.format_response(
                 success=True,
@@ -1,18 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database import get_db
+from typing import List, Optional, Union
+from datetime import datetime, date
+from app.sharding import get_shard_db
 from app.models import User
-from app.schemas import TaskCreate, TaskUpdate, TaskResponse
-from app.services.task_service import TaskService
+from app.schemas import TaskCreate, TaskUpdate, TaskResponse, ArchivedTaskResponse, TaskQuery
+from app.services.task_service import TaskService, SORT_KEYS
+from app.services.archive_service import ArchiveService
 from app.middleware.auth import get_current_user
+from app.middleware.rate_limit import rate_limit
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(rate_limit("tasks"))])
 
 @router.post("/", response_model=TaskResponse, status_code=201)
 def create_task(
     task_data: TaskCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_shard_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new task (starts in 'Not Started' state)."""
@@ -20,19 +23,74 @@ def create_task(
 
 @router.get("/", response_model=List[TaskResponse])
 def get_tasks(
-    state: Optional[str] = Query(None, description="Filter by state: 'Not Started', 'In Progress', or 'Completed'"),
-    db: Session = Depends(get_db),
+    state: Optional[List[str]] = Query(None, description="Filter by state (repeatable): 'Not Started', 'In Progress', 'Completed'"),
+    q: Optional[str] = Query(None, description="Text search in title and description"),
+    created_after: Optional[Union[datetime, date]] = Query(None),
+    created_before: Optional[Union[datetime, date]] = Query(None),
+    updated_after: Optional[Union[datetime, date]] = Query(None),
+    updated_before: Optional[Union[datetime, date]] = Query(None),
+    sort_by: str = Query("created_at", description=f"One of: {SORT_KEYS}"),
+    order: str = Query("desc", description="'asc' or 'desc'"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    include_archived: bool = Query(False, description="Also return archived (old Completed) tasks"),
+    db: Session = Depends(get_shard_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all tasks or filter by state."""
-    if state:
-        return TaskService.get_tasks_by_state(db, state, current_user.id)
-    return TaskService.get_all_tasks(db, current_user.id)
+    """
+    Get tasks with server-side filtering and sorting.
+    
+    Example: ?state=Not Started&state=In Progress&updated_after=2024-01-01&sort_by=updated_at
+    Archived tasks are excluded unless include_archived is set.
+    """
+    query = TaskQuery(
+        states=state,
+        search=q,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        sort_by=sort_by,
+        order=order,
+        limit=limit,
+        offset=offset
+    )
+    return TaskService.query_tasks(db, query, current_user.id, include_archived=include_archived)
+
+@router.get("/archive", response_model=List[ArchivedTaskResponse])
+def get_archived_tasks(
+    db: Session = Depends(get_shard_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get archived tasks (Completed tasks moved out of the active list)."""
+    return ArchiveService.get_archived_tasks(db, current_user.id)
+
+@router.get("/archive/{task_id}", response_model=ArchivedTaskResponse)
+def get_archived_task(
+    task_id: int,
+    db: Session = Depends(get_shard_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a specific archived task by its original ID."""
+    task = ArchiveService.get_archived_task(db, task_id, current_user.id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Archived task not found")
+    return task
+
+@router.delete("/archive/{task_id}", status_code=204)
+def delete_archived_task(
+    task_id: int,
+    db: Session = Depends(get_shard_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete an archived task by its original ID."""
+    ArchiveService.delete_archived_task(db, task_id, current_user.id)
+    return None
 
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_shard_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific task by ID."""
@@ -45,7 +103,7 @@ def get_task(
 def update_task(
     task_id: int,
     task_data: TaskUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_shard_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a task (with state transition validation)."""
@@ -54,7 +112,7 @@ def update_task(
 @router.delete("/{task_id}", status_code=204)
 def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_shard_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a task."""
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from datetime import datetime, date, time, timezone
+from typing import List, Optional
 
 # User Schemas
 class UserCreate(BaseModel):
@@ -46,6 +46,40 @@ class TaskResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class TaskQuery(BaseModel):
+    """Server-side task filters; validated and compiled to SQL by TaskService."""
+    states: Optional[List[str]] = None
+    search: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    sort_by: str = "created_at"
+    order: str = "desc"
+    limit: Optional[int] = Field(None, ge=1, le=500)
+    offset: int = Field(0, ge=0)
+    
+    @field_validator("created_after", "created_before", "updated_after", "updated_before", mode="before")
+    @classmethod
+    def date_to_datetime(cls, value):
+        """Accept plain dates ("2024-05-06") as midnight of that day."""
+        if isinstance(value, str) and len(value) == 10:
+            value = date.fromisoformat(value)
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return datetime.combine(value, time.min)
+        return value
+    
+    @field_validator("created_after", "created_before", "updated_after", "updated_before")
+    @classmethod
+    def to_naive_utc(cls, value):
+        """Timestamps are stored as naive UTC, so convert offsets ("...+02:00") to UTC."""
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+class ArchivedTaskResponse(TaskResponse):
+    archived_at: datetime
+
 # AI Schemas
 class AICommand(BaseModel):
     command: str = Field(..., min_length=1)
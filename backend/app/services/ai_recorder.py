@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Record/replay configuration for Gemini calls
+# off: call Gemini normally
+# record: call Gemini and append every prompt/response pair to AI_RECORD_PATH
+# replay: never call Gemini; answer from the recordings in AI_RECORD_PATH
+AI_RECORD_MODE = os.getenv("AI_RECORD_MODE", "off")
+AI_RECORD_PATH = os.getenv("AI_RECORD_PATH", "./ai_recordings.jsonl")
+
+RECORD_MODES = ["off", "record", "replay"]
+
+
+class MissingRecordingError(Exception):
+    """Raised in replay mode when no recording exists for a command."""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class ResponseRecorder:
+    """
+    Local corpus of Gemini prompt/response pairs (one JSON object per line).
+
+    Recordings are looked up by user command, so replay keeps working when
+    the prompt's date line changes. Each entry also stores a hash of the
+    system prompt it was recorded with, so stale recordings can be spotted
+    after SYSTEM_PROMPT changes.
+    """
+
+    def __init__(self, mode: str = AI_RECORD_MODE, path: str = AI_RECORD_PATH):
+        if mode not in RECORD_MODES:
+            raise ValueError(f"Invalid AI_RECORD_MODE '{mode}'. Must be one of: {RECORD_MODES}")
+        self.mode = mode
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            entries = {}
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            # Later recordings of the same command win
+                            entries[entry["command"]] = entry
+            self._entries = entries
+        return self._entries
+
+    def lookup(self, command: str) -> Dict[str, Any]:
+        """Return the recording for command or raise MissingRecordingError."""
+        with self._lock:
+            entry = self._load().get(command)
+        if entry is None:
+            raise MissingRecordingError(f"No recorded response for command: {command!r}")
+        return entry
+
+    def record(
+        self,
+        command: str,
+        prompt: str,
+        system_prompt: str,
+        response_text: str,
+        model: str,
+        latency: float,
+        usage: Optional[Dict[str, int]] = None
+    ) -> None:
+        """Append one prompt/response pair to the corpus."""
+        entry = {
+            "command": command,
+            "prompt_hash": text_hash(prompt),
+            "system_prompt_hash": text_hash(system_prompt),
+            "model": model,
+            "response": response_text,
+            "latency": round(latency, 4),
+            "usage": usage or {},
+            "recorded_at": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._entries is not None:
+                self._entries[command] = entry
+
+
+_recorder: Optional[ResponseRecorder] = None
+
+
+def get_recorder() -> ResponseRecorder:
+    global _recorder
+    if _recorder is None:
+        _recorder = ResponseRecorder()
+    return _recorder
+
+
+def set_recorder(recorder: ResponseRecorder) -> None:
+    """Swap the recorder (e.g. the replay harness installs a replay-mode one)."""
+    global _recorder
+    _recorder = recorder
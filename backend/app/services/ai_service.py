@@ -1,8 +1,13 @@
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 import os
 import json
-from typing import Dict, Any
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
 from dotenv import load_dotenv
+from app.services.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from app.services.ai_recorder import get_recorder
 
 load_dotenv()
 
@@ -11,6 +16,58 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
+# Resilience configuration for Gemini calls
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "15"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+AI_HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "false").lower() == "true"
+AI_HEDGE_PERCENTILE = float(os.getenv("AI_HEDGE_PERCENTILE", "95"))
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5"))
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", "30"))
+# Force degraded mode (AI disabled, fail fast) without touching the breaker
+AI_DEGRADED_MODE = os.getenv("AI_DEGRADED_MODE", "false").lower() == "true"
+
+AI_UNAVAILABLE_MESSAGE = "AI temporarily unavailable. Please use the task controls or try again shortly."
+
+# How long a fallback model is reused before discovery is tried again
+AI_MODEL_DISCOVERY_RETRY_SECONDS = float(os.getenv("AI_MODEL_DISCOVERY_RETRY_SECONDS", "300"))
+
+# Errors worth retrying: rate limits, server errors and upstream deadlines.
+# Everything else (bad key, invalid or blocked request) fails without retry.
+GEMINI_TRANSIENT_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServerError,
+    google_exceptions.DeadlineExceeded,
+)
+
+gemini_breaker = CircuitBreaker(
+    failure_threshold=AI_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=AI_BREAKER_RESET_SECONDS
+)
+gemini_caller = ResilientCaller(
+    gemini_breaker,
+    timeout=AI_TIMEOUT_SECONDS,
+    max_retries=AI_MAX_RETRIES,
+    hedge_enabled=AI_HEDGE_ENABLED,
+    hedge_percentile=AI_HEDGE_PERCENTILE,
+    retry_on=GEMINI_TRANSIENT_ERRORS
+)
+# Model discovery has its own breaker so list_models successes cannot
+# reset the failure count of the generation breaker.
+discovery_caller = ResilientCaller(
+    CircuitBreaker(
+        failure_threshold=AI_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=AI_BREAKER_RESET_SECONDS
+    ),
+    timeout=AI_TIMEOUT_SECONDS,
+    max_retries=0,
+    max_workers=2,
+    retry_on=GEMINI_TRANSIENT_ERRORS
+)
+
+_model = None
+_model_expires_at = None
+
 class AIService:
     """
     AI Service for interpreting natural language commands.
@@ -46,66 +103,188 @@ Return ONLY valid JSON in this format:
   "new_state": "Not Started|In Progress|Completed",
   "title": "new task title",
   "description": "task description",
-  "filter_state": "Not Started|In Progress|Completed"
+  "filter_state": "Not Started|In Progress|Completed",
+  "filter_states": ["Not Started", "In Progress"],
+  "search": "text to match in title or description",
+  "created_after": "YYYY-MM-DD",
+  "created_before": "YYYY-MM-DD",
+  "updated_after": "YYYY-MM-DD",
+  "updated_before": "YYYY-MM-DD",
+  "sort_by": "created_at|updated_at|title|state",
+  "order": "asc|desc"
 }
 
+For VIEW, include only the filters the user asked for. Use filter_states when more than one state is requested. Resolve relative dates ("this week", "yesterday") against today's date given below.
+
 Examples:
 - "Add a task to prepare presentation" → {"action": "CREATE", "title": "prepare presentation"}
 - "Start working on presentation" → {"action": "UPDATE_STATE", "task_identifier": "presentation", "new_state": "In Progress"}
 - "Mark presentation as completed" → {"action": "UPDATE_STATE", "task_identifier": "presentation", "new_state": "Completed"}
 - "Show all completed tasks" → {"action": "VIEW", "filter_state": "Completed"}
+- "Show unfinished tasks updated since 2024-05-06, most recent first" → {"action": "VIEW", "filter_states": ["Not Started", "In Progress"], "updated_after": "2024-05-06", "sort_by": "updated_at", "order": "desc"}
 - "Delete presentation task" → {"action": "DELETE", "task_identifier": "presentation"}
 
 Return ONLY the JSON object, no other text."""
 
     @staticmethod
-    def interpret_command(command: str) -> Dict[str, Any]:
+    def get_model():
+        """
+        Resolve the Gemini model once and reuse it for later calls.
+        If discovery fails, the 'gemini-pro' fallback is reused for
+        AI_MODEL_DISCOVERY_RETRY_SECONDS before discovery runs again.
+        """
+        global _model, _model_expires_at
+        if _model is not None and (_model_expires_at is None or time.monotonic() < _model_expires_at):
+            return _model
+        
+        # List available models and use the first generative one
+        try:
+            available_models = discovery_caller.call(
+                lambda: list(genai.list_models(request_options={"timeout": AI_TIMEOUT_SECONDS}))
+            )
+            # Find first model that supports generateContent
+            model_name = None
+            for m in available_models:
+                if 'generateContent' in m.supported_generation_methods:
+                    model_name = m.name
+                    break
+            
+            if not model_name:
+                raise Exception("No suitable Gemini model found")
+            
+            _model = genai.GenerativeModel(model_name)
+            _model_expires_at = None
+        except Exception:
+            # Fallback to direct model name without models/ prefix
+            _model = genai.GenerativeModel('gemini-pro')
+            _model_expires_at = time.monotonic() + AI_MODEL_DISCOVERY_RETRY_SECONDS
+        return _model
+    
+    @staticmethod
+    def degraded_response() -> Dict[str, Any]:
+        """Intent returned immediately when the AI layer is unavailable."""
+        return {
+            "action": "ERROR",
+            "message": AI_UNAVAILABLE_MESSAGE,
+            "degraded": True,
+            "retry_after": round(gemini_breaker.retry_after(), 1)
+        }
+    
+    @staticmethod
+    def is_degraded() -> bool:
+        """True when AI calls would be rejected without reaching Gemini."""
+        return AI_DEGRADED_MODE or gemini_breaker.state == CircuitBreaker.OPEN
+    
+    @staticmethod
+    def metrics() -> Dict[str, Any]:
+        """Breaker state, call counters and latency for the Gemini caller."""
+        data = gemini_caller.metrics()
+        data["degraded"] = AIService.is_degraded()
+        data["forced_degraded_mode"] = AI_DEGRADED_MODE
+        return data
+    
+    @staticmethod
+    def build_prompt(command: str) -> str:
+        """Full prompt sent to Gemini for a user command."""
+        today = datetime.utcnow().strftime("%Y-%m-%d (%A)")
+        return f"{AIService.SYSTEM_PROMPT}\n\nToday's date: {today}\n\nUser command: {command}\n\nJSON response:"
+    
+    @staticmethod
+    def generate(command: str, prompt: str) -> str:
+        """
+        Get the raw model text for a prompt.
+        
+        In replay mode the text comes from the local recordings; otherwise
+        Gemini is called through gemini_caller (and the pair is recorded
+        in record mode).
+        """
+        recorder = get_recorder()
+        if recorder.replaying:
+            return recorder.lookup(command)["response"]
+        
+        model = AIService.get_model()
+        started = time.perf_counter()
+        # The request timeout makes hung calls end upstream too; the caller's
+        # timeout alone cannot stop a call that is already running
+        response = gemini_caller.call(
+            lambda: model.generate_content(prompt, request_options={"timeout": AI_TIMEOUT_SECONDS})
+        )
+        response_text = response.text
+        
+        if recorder.recording:
+            usage_metadata = getattr(response, "usage_metadata", None)
+            usage = {
+                "prompt_tokens": getattr(usage_metadata, "prompt_token_count", None),
+                "response_tokens": getattr(usage_metadata, "candidates_token_count", None)
+            } if usage_metadata else None
+            recorder.record(
+                command=command,
+                prompt=prompt,
+                system_prompt=AIService.SYSTEM_PROMPT,
+                response_text=response_text,
+                model=getattr(model, "model_name", ""),
+                latency=time.perf_counter() - started,
+                usage=usage
+            )
+        return response_text
+    
+    @staticmethod
+    def parse_response(response_text: str) -> Dict[str, Any]:
+        """Strip markdown fences from the model text and parse the JSON intent."""
+        response_text = response_text.strip()
+        
+        # Remove markdown code blocks if present
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]
+        if response_text.startswith("```"):
+            response_text = response_text[3:]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]
+        
+        response_text = response_text.strip()
+        
+        # Parse JSON
+        return json.loads(response_text)
+    
+    @staticmethod
+    def interpret_command(command: str, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
         """
         Interprets a natural language command using Gemini AI.
         Returns structured intent data that will be validated by TaskService.
+        
+        Calls go through gemini_caller (timeouts, retries, hedging, circuit
+        breaker). When the breaker is open or degraded mode is forced, a
+        degraded ERROR intent is returned without calling Gemini.
+        
+        If a timings dict is passed, the seconds spent in the "model" and
+        "parse" stages are stored in it.
         """
-        if not GEMINI_API_KEY:
+        replaying = get_recorder().replaying
+        
+        if not GEMINI_API_KEY and not replaying:
             raise Exception("GEMINI_API_KEY not configured. Please set it in .env file")
         
+        if AIService.is_degraded() and not replaying:
+            return AIService.degraded_response()
+        
+        if timings is None:
+            timings = {}
+        
         try:
-            # List available models and use the first generative one
-            try:
-                available_models = genai.list_models()
-                # Find first model that supports generateContent
-                model_name = None
-                for m in available_models:
-                    if 'generateContent' in m.supported_generation_methods:
-                        model_name = m.name
-                        break
-                
-                if not model_name:
-                    raise Exception("No suitable Gemini model found")
-                
-                model = genai.GenerativeModel(model_name)
-            except:
-                # Fallback to direct model name without models/ prefix
-                model = genai.GenerativeModel('gemini-pro')
-            
-            full_prompt = f"{AIService.SYSTEM_PROMPT}\n\nUser command: {command}\n\nJSON response:"
-            
-            response = model.generate_content(full_prompt)
-            response_text = response.text.strip()
+            prompt = AIService.build_prompt(command)
             
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
+            started = time.perf_counter()
+            response_text = AIService.generate(command, prompt)
+            timings["model"] = time.perf_counter() - started
             
-            response_text = response_text.strip()
-            
-            # Parse JSON
-            intent = json.loads(response_text)
-            
-            return intent
+            started = time.perf_counter()
+            try:
+                return AIService.parse_response(response_text)
+            finally:
+                timings["parse"] = time.perf_counter() - started
             
+        except CircuitOpenError:
+            return AIService.degraded_response()
         except json.JSONDecodeError as e:
             return {
                 "action": "ERROR",
@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from app.models import Task, ArchivedTask
+from app.sharding import shard_router
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Archive configuration
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+# Only terminal-state tasks may be archived (see STATE_TRANSITIONS)
+ARCHIVABLE_STATE = "Completed"
+
+
+class ArchiveService:
+    """
+    Hot/cold split for tasks.
+
+    Completed tasks older than ARCHIVE_AFTER_DAYS are moved from `tasks`
+    to `archived_tasks` in batches, so normal list/search queries only scan
+    live work. Archived tasks are read-only (they can only be deleted)
+    and reachable explicitly.
+    """
+
+    @staticmethod
+    def archive_completed_tasks(
+        db: Session,
+        older_than_days: float = ARCHIVE_AFTER_DAYS,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+        max_batches: Optional[int] = None
+    ) -> int:
+        """
+        Move Completed tasks last updated before the cutoff into the archive.
+        Each batch is copied and deleted in one transaction. Returns the
+        number of tasks archived.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        archived = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            candidates = db.query(Task).filter(
+                Task.state == ARCHIVABLE_STATE,
+                Task.updated_at < cutoff
+            ).order_by(Task.updated_at).limit(batch_size).all()
+
+            if not candidates:
+                break
+
+            now = datetime.utcnow()
+            ids = [t.id for t in candidates]
+            db.add_all([
+                ArchivedTask(
+                    id=t.id,
+                    title=t.title,
+                    description=t.description,
+                    state=t.state,
+                    created_at=t.created_at,
+                    updated_at=t.updated_at,
+                    archived_at=now,
+                    owner_id=t.owner_id
+                )
+                for t in candidates
+            ])
+
+            # Re-check the filter so a task edited since the read is left alone
+            deleted = db.query(Task).filter(
+                Task.id.in_(ids),
+                Task.state == ARCHIVABLE_STATE,
+                Task.updated_at < cutoff
+            ).delete(synchronize_session=False)
+
+            if deleted != len(ids):
+                db.rollback()
+                continue
+
+            db.commit()
+            db.expunge_all()
+            archived += deleted
+            batches += 1
+
+        return archived
+
+    @staticmethod
+    def get_archived_tasks(db: Session, user_id: int) -> List[ArchivedTask]:
+        """Get archived tasks for the current user, most recently archived first."""
+        return db.query(ArchivedTask).filter(
+            ArchivedTask.owner_id == user_id
+        ).order_by(ArchivedTask.archived_at.desc()).all()
+
+    @staticmethod
+    def get_archived_task(db: Session, task_id: int, user_id: int) -> Optional[ArchivedTask]:
+        """Get a specific archived task by its original task ID."""
+        return db.query(ArchivedTask).filter(
+            ArchivedTask.id == task_id,
+            ArchivedTask.owner_id == user_id
+        ).first()
+
+    @staticmethod
+    def find_archived_tasks_by_title(db: Session, title: str, user_id: int) -> List[ArchivedTask]:
+        """Find archived tasks matching a title (case-insensitive partial match)."""
+        return db.query(ArchivedTask).filter(
+            ArchivedTask.owner_id == user_id,
+            ArchivedTask.title.ilike(f"%{title}%")
+        ).all()
+
+    @staticmethod
+    def delete_archived_task(db: Session, task_id: int, user_id: int) -> bool:
+        """Delete an archived task by its original task ID."""
+        task = ArchiveService.get_archived_task(db, task_id, user_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Archived task not found")
+
+        db.delete(task)
+        db.commit()
+        return True
+
+
+class ArchiveWorker:
+    """Background thread that runs the archive sweep on every shard every interval seconds."""
+
+    def __init__(self, interval: float = ARCHIVE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="task-archiver", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for shard_id, session_factory in enumerate(shard_router.session_factories):
+                db = session_factory()
+                try:
+                    count = ArchiveService.archive_completed_tasks(db)
+                    if count:
+                        logger.info("Archived %d completed task(s) on shard %d", count, shard_id)
+                except Exception:
+                    logger.exception("Task archive sweep failed on shard %d", shard_id)
+                    db.rollback()
+                finally:
+                    db.close()
+            self._stop.wait(self.interval)
+
+
+archive_worker = ArchiveWorker()
+
+
+if __name__ == "__main__":
+    # One-off sweep of every shard: python -m app.services.archive_service
+    for shard_id, session_factory in enumerate(shard_router.session_factories):
+        db = session_factory()
+        try:
+            print(f"Shard {shard_id}: archived {ArchiveService.archive_completed_tasks(db)} task(s)")
+        finally:
+            db.close()
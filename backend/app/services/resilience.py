@@ -0,0 +1,276 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class UpstreamTimeoutError(Exception):
+    """Raised when an upstream call does not finish within its timeout."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    States:
+    - closed: calls flow normally, consecutive failures are counted
+    - open: calls are rejected immediately until reset_timeout has passed
+    - half_open: a single trial call is allowed; success closes, failure re-opens
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed right now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call that says nothing about upstream health (e.g. a rejected request)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker will allow a trial call."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "retry_after": round(self.retry_after(), 2),
+        }
+
+
+class ResilientCaller:
+    """
+    Wraps an upstream call with per-attempt timeouts, jittered retries,
+    optional hedged requests and a circuit breaker.
+
+    A hedged request is a second copy of the same call fired when the first
+    has not returned after the observed latency percentile (hedge_percentile).
+    Whichever copy succeeds first wins.
+
+    Only errors listed in retry_on (plus UpstreamTimeoutError) are retried and
+    counted against the breaker. Anything else (bad API key, invalid or blocked
+    request) is raised straight away.
+
+    Limitation: a timed-out call cannot be interrupted. Its worker thread keeps
+    running until the upstream returns, and time spent waiting for a free
+    worker counts against the next call's timeout. Callers should also pass
+    the timeout to the upstream client so hung calls end on their own.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        timeout: float = 15.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 2.0,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        max_workers: int = 8,
+        retry_on: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.breaker = breaker
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.retry_on = (UpstreamTimeoutError,) + tuple(retry_on)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream")
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._counters = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "short_circuited": 0,
+        }
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_enabled:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+        delay = self._percentile(self.hedge_percentile)
+        if delay is None or delay >= self.timeout:
+            return None
+        return delay
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _attempt(self, func: Callable[[], Any]) -> Any:
+        """Run one attempt (plus an optional hedge) bounded by self.timeout."""
+        started = time.monotonic()
+        primary = self._executor.submit(func)
+        pending = {primary}
+        hedge_delay = self._hedge_delay()
+
+        if hedge_delay is not None:
+            done, _ = wait(pending, timeout=hedge_delay)
+            if not done:
+                self._incr("hedges")
+                pending.add(self._executor.submit(func))
+
+        last_error: Optional[BaseException] = None
+        while pending:
+            remaining = self.timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._incr("hedge_wins")
+                    for other in pending:
+                        other.cancel()
+                    with self._lock:
+                        self._latencies.append(time.monotonic() - started)
+                    return future.result()
+                last_error = future.exception()
+
+        if last_error is not None and not pending:
+            raise last_error
+
+        for future in pending:
+            future.cancel()
+        self._incr("timeouts")
+        raise UpstreamTimeoutError(f"Upstream call timed out after {self.timeout:.1f}s")
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """
+        Call func through the breaker with timeouts, retries and hedging.
+
+        Raises CircuitOpenError immediately if the breaker is open. Errors not
+        in retry_on are re-raised at once; transient ones are re-raised once
+        retries are exhausted.
+        """
+        self._incr("calls")
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow_request():
+                self._incr("short_circuited")
+                raise CircuitOpenError("Circuit breaker is open")
+
+            try:
+                result = self._attempt(func)
+            except self.retry_on as e:
+                last_error = e
+                self.breaker.record_failure()
+                if attempt < self.max_retries:
+                    self._incr("retries")
+                    time.sleep(self._backoff(attempt))
+                continue
+            except Exception:
+                self.breaker.release()
+                self._incr("failures")
+                raise
+
+            self.breaker.record_success()
+            self._incr("successes")
+            return result
+
+        self._incr("failures")
+        raise last_error
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            samples = len(self._latencies)
+        p50 = self._percentile(50)
+        p95 = self._percentile(95)
+        return {
+            "breaker": self.breaker.snapshot(),
+            "counters": counters,
+            "latency": {
+                "samples": samples,
+                "p50": round(p50, 3) if p50 is not None else None,
+                "p95": round(p95, 3) if p95 is not None else None,
+            },
+            "config": {
+                "timeout": self.timeout,
+                "max_retries": self.max_retries,
+                "hedge_enabled": self.hedge_enabled,
+                "hedge_percentile": self.hedge_percentile,
+            },
+        }
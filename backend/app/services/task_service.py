@@ -1,8 +1,10 @@
+from sqlalchemy import asc, desc, select, union_all
 from sqlalchemy.orm import Session
-from app.models import Task
-from app.schemas import TaskCreate, TaskUpdate
+from app.models import Task, ArchivedTask
+from app.schemas import TaskCreate, TaskUpdate, TaskQuery
 from fastapi import HTTPException
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
+from app.services.write_batcher import WRITE_BATCHING_ENABLED, get_write_batcher
 
 # STATE MACHINE - CENTRALIZED BUSINESS LOGIC
 # This is the core state transition logic that MUST NOT be in UI or AI code
@@ -14,6 +16,13 @@ STATE_TRANSITIONS = {
 
 VALID_STATES = ["Not Started", "In Progress", "Completed"]
 
+# Columns clients may sort by (anything else is rejected)
+SORT_KEYS = ["created_at", "updated_at", "title", "state"]
+SORT_ORDERS = ["asc", "desc"]
+
+# Columns shared by tasks and archived_tasks (combined with include_archived)
+TASK_COLUMNS = ["id", "title", "description", "state", "created_at", "updated_at", "owner_id"]
+
 class TaskService:
     """
     Centralized business logic for task management.
@@ -40,19 +49,39 @@ class TaskService:
         allowed_transitions = STATE_TRANSITIONS.get(current_state, [])
         return new_state in allowed_transitions
     
+    @staticmethod
+    def run_write(db: Session, op: Callable[[Session], Any]) -> Any:
+        """
+        Apply a mutation op(session) and commit it.
+        
+        Default: op runs on the request session and commits on its own.
+        With WRITE_BATCHING_ENABLED, op is handed to the group-commit
+        write batcher for db's database (shard) and this call returns
+        after the shared commit.
+        """
+        if WRITE_BATCHING_ENABLED:
+            return get_write_batcher(str(db.get_bind().url)).submit(op)
+        
+        result = op(db)
+        db.commit()
+        if isinstance(result, Task):
+            db.refresh(result)
+        return result
+    
     @staticmethod
     def create_task(db: Session, task_data: TaskCreate, user_id: int) -> Task:
         """Create a new task in 'Not Started' state."""
-        task = Task(
-            title=task_data.title,
-            description=task_data.description or "",
-            state="Not Started",
-            owner_id=user_id
-        )
-        db.add(task)
-        db.commit()
-        db.refresh(task)
-        return task
+        def op(session: Session) -> Task:
+            task = Task(
+                title=task_data.title,
+                description=task_data.description or "",
+                state="Not Started",
+                owner_id=user_id
+            )
+            session.add(task)
+            return task
+        
+        return TaskService.run_write(db, op)
     
     @staticmethod
     def get_task_by_id(db: Session, task_id: int, user_id: int) -> Optional[Task]:
@@ -78,45 +107,126 @@ class TaskService:
             Task.state == state
         ).order_by(Task.created_at.desc()).all()
     
+    @staticmethod
+    def validate_query(query: TaskQuery) -> None:
+        """Reject unknown states, sort keys and sort orders."""
+        if query.states:
+            invalid = [s for s in query.states if s not in VALID_STATES]
+            if invalid:
+                raise HTTPException(status_code=400, detail=f"Invalid state(s) {invalid}. Must be one of: {VALID_STATES}")
+        if query.sort_by not in SORT_KEYS:
+            raise HTTPException(status_code=400, detail=f"Invalid sort_by. Must be one of: {SORT_KEYS}")
+        if query.order not in SORT_ORDERS:
+            raise HTTPException(status_code=400, detail=f"Invalid order. Must be one of: {SORT_ORDERS}")
+    
+    @staticmethod
+    def build_query(db: Session, model, query: TaskQuery, user_id: int):
+        """
+        Compile a TaskQuery into one SQL query on `model` (Task or ArchivedTask).
+        Filters are owner-scoped first so the (owner_id, ...) indexes apply.
+        """
+        q = db.query(model).filter(model.owner_id == user_id)
+        
+        if query.states:
+            q = q.filter(model.state.in_(query.states))
+        if query.created_after:
+            q = q.filter(model.created_at >= query.created_after)
+        if query.created_before:
+            q = q.filter(model.created_at < query.created_before)
+        if query.updated_after:
+            q = q.filter(model.updated_at >= query.updated_after)
+        if query.updated_before:
+            q = q.filter(model.updated_at < query.updated_before)
+        if query.search:
+            pattern = f"%{query.search}%"
+            q = q.filter(model.title.ilike(pattern) | model.description.ilike(pattern))
+        
+        sort_column = getattr(model, query.sort_by)
+        if query.order == "asc":
+            q = q.order_by(sort_column.asc(), model.id.asc())
+        else:
+            q = q.order_by(sort_column.desc(), model.id.desc())
+        return q
+    
+    @staticmethod
+    def query_tasks(db: Session, query: TaskQuery, user_id: int, include_archived: bool = False) -> List[Task]:
+        """
+        Filter, sort and page tasks in SQL.
+        
+        With include_archived, the task and archive queries are combined
+        with UNION ALL and sorted/paged by SQLite as one result set; rows
+        then carry the TaskResponse columns rather than ORM objects.
+        """
+        TaskService.validate_query(query)
+        
+        hot = TaskService.build_query(db, Task, query, user_id)
+        search_archive = include_archived and (not query.states or "Completed" in query.states)
+        
+        if not search_archive:
+            if query.offset:
+                hot = hot.offset(query.offset)
+            if query.limit:
+                hot = hot.limit(query.limit)
+            return hot.all()
+        
+        archived = TaskService.build_query(db, ArchivedTask, query, user_id)
+        combined = union_all(*[
+            q.order_by(None).with_entities(*[getattr(model, c) for c in TASK_COLUMNS]).statement
+            for q, model in ((hot, Task), (archived, ArchivedTask))
+        ]).subquery()
+        
+        direction = asc if query.order == "asc" else desc
+        stmt = select(combined).order_by(
+            direction(combined.c[query.sort_by]), direction(combined.c.id)
+        )
+        if query.offset:
+            stmt = stmt.offset(query.offset)
+        if query.limit:
+            stmt = stmt.limit(query.limit)
+        return db.execute(stmt).all()
+    
     @staticmethod
     def update_task(db: Session, task_id: int, task_data: TaskUpdate, user_id: int) -> Task:
         """Update a task with validation."""
-        task = TaskService.get_task_by_id(db, task_id, user_id)
-        
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        
-        # Update title and description
-        if task_data.title is not None:
-            task.title = task_data.title
-        if task_data.description is not None:
-            task.description = task_data.description
-        
-        # Handle state transition with validation
-        if task_data.state is not None:
-            if not TaskService.validate_state_transition(task.state, task_data.state):
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Invalid state transition: '{task.state}' → '{task_data.state}'. "
-                           f"Allowed transitions from '{task.state}': {STATE_TRANSITIONS.get(task.state, [])}"
-                )
-            task.state = task_data.state
+        def op(session: Session) -> Task:
+            task = TaskService.get_task_by_id(session, task_id, user_id)
+            
+            if not task:
+                raise HTTPException(status_code=404, detail="Task not found")
+            
+            # Update title and description
+            if task_data.title is not None:
+                task.title = task_data.title
+            if task_data.description is not None:
+                task.description = task_data.description
+            
+            # Handle state transition with validation
+            if task_data.state is not None:
+                if not TaskService.validate_state_transition(task.state, task_data.state):
+                    raise HTTPException(
+                        status_code=400, 
+                        detail=f"Invalid state transition: '{task.state}' → '{task_data.state}'. "
+                               f"Allowed transitions from '{task.state}': {STATE_TRANSITIONS.get(task.state, [])}"
+                    )
+                task.state = task_data.state
+            
+            return task
         
-        db.commit()
-        db.refresh(task)
-        return task
+        return TaskService.run_write(db, op)
     
     @staticmethod
     def delete_task(db: Session, task_id: int, user_id: int) -> bool:
         """Delete a task."""
-        task = TaskService.get_task_by_id(db, task_id, user_id)
-        
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
+        def op(session: Session) -> bool:
+            task = TaskService.get_task_by_id(session, task_id, user_id)
+            
+            if not task:
+                raise HTTPException(status_code=404, detail="Task not found")
+            
+            session.delete(task)
+            return True
         
-        db.delete(task)
-        db.commit()
-        return True
+        return TaskService.run_write(db, op)
     
     @staticmethod
     def find_task_by_title(db: Session, title: str, user_id: int) -> Optional[Task]:
@@ -0,0 +1,173 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from dotenv import load_dotenv
+from app.database import SQLALCHEMY_DATABASE_URL, Base
+
+load_dotenv()
+
+# Group-commit configuration (off by default: each request commits on its own)
+WRITE_BATCHING_ENABLED = os.getenv("WRITE_BATCHING_ENABLED", "false").lower() == "true"
+WRITE_BATCH_WINDOW_MS = float(os.getenv("WRITE_BATCH_WINDOW_MS", "5"))
+WRITE_BATCH_MAX_OPS = int(os.getenv("WRITE_BATCH_MAX_OPS", "64"))
+
+WriteOp = Callable[[Session], Any]
+
+
+def create_batch_engine(url: str):
+    """
+    Engine for the batch writer.
+
+    pysqlite's own transaction handling breaks SAVEPOINT, so it is switched off
+    and we emit BEGIN IMMEDIATE ourselves (the documented SQLAlchemy recipe).
+    BEGIN IMMEDIATE also takes the write lock once per batch instead of per op.
+    """
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+class WriteBatcher:
+    """
+    Group-commit write pipeline.
+
+    Mutations submitted from many requests are gathered for up to window_ms
+    (or max_ops operations) and applied in ONE transaction. Each operation
+    runs inside its own SAVEPOINT, so a failing op (e.g. an invalid state
+    transition) is rolled back alone and its caller gets the error, while
+    the rest of the batch still commits. Callers are released only after
+    the batch commit has completed.
+    """
+
+    def __init__(self, session_factory: sessionmaker, window_ms: float = 5.0, max_ops: int = 64):
+        self.session_factory = session_factory
+        self.window = window_ms / 1000.0
+        self.max_ops = max_ops
+        self._queue: "queue.Queue[Optional[Tuple[WriteOp, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Flush pending operations and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def submit(self, op: WriteOp) -> Any:
+        """
+        Queue op(session) for the next batch and block until it is committed.
+        Returns op's result, or re-raises the exception op raised.
+        """
+        self.start()
+        future: Future = Future()
+        self._queue.put((op, future))
+        return future.result()
+
+    def _collect(self, first: Tuple[WriteOp, Future]) -> Tuple[List[Tuple[WriteOp, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_ops:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            self._execute(batch)
+            if stopping:
+                return
+
+    def _execute(self, batch: List[Tuple[WriteOp, Future]]) -> None:
+        session = self.session_factory()
+        outcomes = []
+        try:
+            for op, future in batch:
+                try:
+                    with session.begin_nested():
+                        result = op(session)
+                        session.flush()
+                        if isinstance(result, Base) and result in session:
+                            session.refresh(result)
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            session.close()
+            for op, future in batch:
+                future.set_exception(e)
+            return
+
+        # Detach results so callers can read them from their own threads
+        session.close()
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_batchers: Dict[str, WriteBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_write_batcher(url: str = SQLALCHEMY_DATABASE_URL) -> WriteBatcher:
+    """
+    Batch writer for one database (one per shard file, since SQLite
+    transactions cannot span files).
+    """
+    with _batchers_lock:
+        batcher = _batchers.get(url)
+        if batcher is None:
+            session_factory = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                expire_on_commit=False,
+                bind=create_batch_engine(url)
+            )
+            batcher = WriteBatcher(session_factory, window_ms=WRITE_BATCH_WINDOW_MS, max_ops=WRITE_BATCH_MAX_OPS)
+            _batchers[url] = batcher
+        return batcher
+
+
+def stop_write_batchers() -> None:
+    """Flush and stop every batch writer."""
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    for batcher in batchers:
+        batcher.stop()
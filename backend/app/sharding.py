@@ -0,0 +1,527 @@
+import argparse
+import bisect
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+from dotenv import load_dotenv
+from app.database import engine, SessionLocal, Base, ensure_columns, ensure_indexes, ensure_autoincrement
+from app.models import User, UserShard, Task, ArchivedTask
+from app.middleware.auth import get_current_user
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Sharding configuration
+# Shard 0 is the main database (users, shard directory and legacy tasks).
+# Shards 1..N-1 are separate SQLite files holding only task tables.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_URL_TEMPLATE = os.getenv("SHARD_URL_TEMPLATE", "sqlite:///./tasks_shard_{shard}.db")
+SHARD_VIRTUAL_NODES = int(os.getenv("SHARD_VIRTUAL_NODES", "64"))
+# Retry-After (seconds) for task writes refused while a user is being moved
+SHARD_MOVE_RETRY_AFTER = 5
+
+# Tables stored on every shard
+SHARDED_TABLES = [Task.__table__, ArchivedTask.__table__]
+
+
+# Requests that only read tasks (allowed while a user is being moved)
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class UserMovingError(Exception):
+    """Raised for task writes while the user's tasks are being moved between shards."""
+
+
+def user_moving_http_error() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Your tasks are being moved. Please retry shortly.",
+        headers={"Retry-After": str(SHARD_MOVE_RETRY_AFTER)}
+    )
+
+
+class ShardUnavailableError(Exception):
+    """Raised when the directory points a user at a shard that is no longer configured."""
+
+
+def create_shard_engine(url: str):
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def _hash(value: str) -> int:
+    # md5 is stable across processes (unlike hash()), which the ring relies on
+    return int(hashlib.md5(value.encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes, mapping keys to shard ids."""
+
+    def __init__(self, shard_count: int, virtual_nodes: int = SHARD_VIRTUAL_NODES):
+        points = sorted(
+            (_hash(f"shard-{shard}-vnode-{v}"), shard)
+            for shard in range(shard_count)
+            for v in range(virtual_nodes)
+        )
+        self._keys = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def get(self, key: str) -> int:
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._shards[index]
+
+
+class ShardRouter:
+    """
+    Routes each user's tasks to one of N task databases.
+
+    New users are placed with consistent hashing and the placement is
+    recorded in the user_shards directory table, so a user only moves
+    when move_user()/rebalance() moves them explicitly.
+
+    Shards beyond len(engines) (left in the directory after SHARD_COUNT was
+    lowered) are only opened, via url_template, to move users off them.
+    """
+
+    def __init__(
+        self,
+        directory_factory: sessionmaker,
+        engines: List,
+        virtual_nodes: int = SHARD_VIRTUAL_NODES,
+        url_template: Optional[str] = None
+    ):
+        self.directory_factory = directory_factory
+        self.engines = engines
+        self.session_factories = [
+            sessionmaker(autocommit=False, autoflush=False, bind=e) for e in engines
+        ]
+        self.ring = HashRing(len(engines), virtual_nodes)
+        self.url_template = url_template
+        self._removed_factories: Dict[int, sessionmaker] = {}
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.engines)
+
+    def create_all(self) -> None:
+        """Create task tables (and their indexes) on every shard."""
+        for shard_engine in self.engines:
+            Base.metadata.create_all(bind=shard_engine, tables=SHARDED_TABLES)
+            # Task databases created before ids were AUTOINCREMENT
+            ensure_autoincrement(shard_engine, Task.__table__, id_columns=["archived_tasks.id"])
+            ensure_indexes(bind=shard_engine, tables=SHARDED_TABLES)
+
+    def _session_factory(self, shard_id: int) -> sessionmaker:
+        """Session factory for a configured shard, or for a removed one (to move users off it)."""
+        if shard_id < self.shard_count:
+            return self.session_factories[shard_id]
+        if shard_id not in self._removed_factories:
+            if self.url_template is None:
+                raise ShardUnavailableError(f"Shard {shard_id} is not configured")
+            url = self.url_template.format(shard=shard_id)
+            database = make_url(url).database
+            if database and not os.path.exists(database):
+                raise ShardUnavailableError(f"Shard {shard_id} database not found: {database}")
+            self._removed_factories[shard_id] = sessionmaker(
+                autocommit=False, autoflush=False, bind=create_shard_engine(url)
+            )
+        return self._removed_factories[shard_id]
+
+    def shard_for_bind(self, bind) -> Optional[int]:
+        """Configured shard id whose database bind points at, or None."""
+        url = str(bind.url)
+        for shard_id, shard_engine in enumerate(self.engines):
+            if str(shard_engine.url) == url:
+                return shard_id
+        return None
+
+    def check_writable(self, user_id: int, shard_id: int) -> None:
+        """
+        Raise UserMovingError unless shard_id is the user's shard and no
+        move is in progress. See refuse_writes_during_moves().
+        """
+        directory = self.directory_factory()
+        try:
+            entry = directory.get(UserShard, user_id)
+            if entry is not None and (entry.moving or entry.shard_id != shard_id):
+                raise UserMovingError(f"Tasks of user {user_id} are being moved or have moved off shard {shard_id}")
+        finally:
+            directory.close()
+
+    def _wait_for_writers(self, shard_id: int) -> None:
+        """Take and release the shard's write lock, so transactions already writing to it finish first."""
+        raw = self._session_factory(shard_id).kw["bind"].raw_connection()
+        try:
+            conn = raw.driver_connection
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("COMMIT")
+        finally:
+            raw.close()
+
+    def removed_shards(self) -> Dict[int, int]:
+        """Users per directory shard id that is no longer configured (>= shard_count)."""
+        directory = self.directory_factory()
+        try:
+            rows = directory.query(UserShard.shard_id).filter(UserShard.shard_id >= self.shard_count).all()
+        finally:
+            directory.close()
+        counts: Dict[int, int] = {}
+        for (shard_id,) in rows:
+            counts[shard_id] = counts.get(shard_id, 0) + 1
+        return counts
+
+    def validate_directory(self) -> Dict[int, int]:
+        """
+        Report users assigned to shards beyond SHARD_COUNT (e.g. after it was
+        lowered). Their task requests fail with 503 until `rebalance` moves them.
+        """
+        removed = self.removed_shards()
+        for shard_id, users in sorted(removed.items()):
+            logger.error(
+                "%d user(s) are assigned to shard %d, but SHARD_COUNT is %d; "
+                "run `python -m app.sharding rebalance` to move them",
+                users, shard_id, self.shard_count
+            )
+        return removed
+
+    def ring_shard(self, user_id: int) -> int:
+        """Shard the hash ring would choose for a user."""
+        return self.ring.get(str(user_id))
+
+    def locate(self, user_id: int) -> Tuple[int, bool]:
+        """
+        Return (shard_id, moving) for a user, assigning a shard via the
+        ring on first use.
+        """
+        directory = self.directory_factory()
+        try:
+            entry = directory.get(UserShard, user_id)
+            if entry is not None:
+                return entry.shard_id, entry.moving
+
+            shard_id = self.ring_shard(user_id)
+            directory.add(UserShard(user_id=user_id, shard_id=shard_id))
+            try:
+                directory.commit()
+            except IntegrityError:
+                # Another request assigned this user first
+                directory.rollback()
+                entry = directory.get(UserShard, user_id)
+                return entry.shard_id, entry.moving
+            return shard_id, False
+        finally:
+            directory.close()
+
+    def get_shard(self, user_id: int) -> int:
+        """Look up the user's shard, assigning one via the ring on first use."""
+        return self.locate(user_id)[0]
+
+    def session_for_user(self, user_id: int, write: bool = True) -> Session:
+        """
+        Open a session on the user's shard. Raises UserMovingError for
+        writes while move_user() is copying the user's tasks, and
+        ShardUnavailableError if the user's shard has been removed.
+        """
+        shard_id, moving = self.locate(user_id)
+        if shard_id >= self.shard_count:
+            raise ShardUnavailableError(f"Tasks of user {user_id} are on removed shard {shard_id}")
+        if write and moving:
+            raise UserMovingError(f"Tasks of user {user_id} are being moved to another shard")
+        return self.session_factories[shard_id]()
+
+    def backfill_directory(self, shard_id: int = 0) -> int:
+        """
+        Pin users that already own tasks on shard_id but have no directory entry.
+        Before sharding all tasks lived in the main database (shard 0), so
+        existing users stay where their data is until they are rebalanced.
+        """
+        shard = self.session_factories[shard_id]()
+        directory = self.directory_factory()
+        try:
+            owners = {owner_id for (owner_id,) in shard.query(Task.owner_id).distinct()}
+            owners |= {owner_id for (owner_id,) in shard.query(ArchivedTask.owner_id).distinct()}
+            assigned = {user_id for (user_id,) in directory.query(UserShard.user_id)}
+            missing = sorted(owners - assigned)
+            directory.add_all([UserShard(user_id=user_id, shard_id=shard_id) for user_id in missing])
+            directory.commit()
+            return len(missing)
+        finally:
+            shard.close()
+            directory.close()
+
+    def _set_moving(self, user_id: int, moving: bool) -> None:
+        directory = self.directory_factory()
+        try:
+            directory.get(UserShard, user_id).moving = moving
+            directory.commit()
+        finally:
+            directory.close()
+
+    @staticmethod
+    def _snapshot(session: Session, user_id: int) -> Tuple[List, List]:
+        """(id, updated_at) of the user's tasks and ids of their archived tasks."""
+        tasks = session.query(Task.id, Task.updated_at).filter(Task.owner_id == user_id).order_by(Task.id).all()
+        archived = session.query(ArchivedTask.id).filter(ArchivedTask.owner_id == user_id).order_by(ArchivedTask.id).all()
+        return [tuple(row) for row in tasks], [row[0] for row in archived]
+
+    @staticmethod
+    def _sync_sequence(session: Session) -> None:
+        """Keep the tasks id sequence above every task and archived task id."""
+        session.execute(text(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, "
+            "(SELECT COALESCE(MAX(id), 0) FROM tasks), "
+            "(SELECT COALESCE(MAX(id), 0) FROM archived_tasks)) "
+            "WHERE name = 'tasks'"
+        ))
+
+    @staticmethod
+    def _renumber(session: Session, ids: Set[int]) -> Dict[int, int]:
+        """
+        Give new ids to those of `ids` already used on session's shard by a
+        task or an archived task. Takes the shard's write lock, which is
+        held until the session commits.
+        """
+        session.execute(text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', 0 "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'tasks')"
+        ))
+        ShardRouter._sync_sequence(session)
+        if not ids:
+            return {}
+
+        taken = {task_id for (task_id,) in session.query(Task.id).filter(Task.id.in_(ids))}
+        taken |= {task_id for (task_id,) in session.query(ArchivedTask.id).filter(ArchivedTask.id.in_(ids))}
+        seq = session.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'")).scalar()
+        next_id = max(seq, max(ids)) + 1
+        return {old_id: new_id for new_id, old_id in enumerate(sorted(taken), start=next_id)}
+
+    def move_user(self, user_id: int, target: int) -> Dict[str, Any]:
+        """
+        Move all of a user's tasks (hot and archived) to another shard.
+
+        The user is marked as moving first. Task writes re-check that flag
+        while holding their shard's write lock (refuse_writes_during_moves),
+        so once the move has taken and released the source's write lock,
+        no write for the user can land on the source: earlier ones have
+        committed and later ones are refused, also after the directory is
+        switched. Tasks are then copied to the target, the directory is
+        switched and the source rows are deleted. If the tasks changed
+        during the copy (e.g. archived), the move is undone and
+        RuntimeError is raised.
+
+        Task ids are kept unless the target already uses them (for a task
+        or an archived task); those tasks get new ids. Returns
+        {"rows": rows_moved, "renumbered": {old_id: new_id}}.
+        """
+        if not 0 <= target < self.shard_count:
+            raise ValueError(f"Shard {target} does not exist (shards: 0-{self.shard_count - 1})")
+
+        source, moving = self.locate(user_id)
+        if source == target:
+            if moving:
+                # Left over from an interrupted move
+                self._set_moving(user_id, False)
+            return {"rows": 0, "renumbered": {}}
+
+        self._set_moving(user_id, True)
+        try:
+            self._wait_for_writers(source)
+            return self._copy_user(user_id, source, target)
+        except Exception:
+            self._set_moving(user_id, False)
+            raise
+
+    def _copy_user(self, user_id: int, source: int, target: int) -> Dict[str, Any]:
+        src = self._session_factory(source)(info={"shard_move": True})
+        dst = self.session_factories[target](info={"shard_move": True})
+        directory = self.directory_factory()
+        try:
+            snapshot = self._snapshot(src, user_id)
+            tasks = src.query(Task).filter(Task.owner_id == user_id).all()
+            archived = src.query(ArchivedTask).filter(ArchivedTask.owner_id == user_id).all()
+
+            id_map = self._renumber(dst, {t.id for t in tasks} | {a.id for a in archived})
+            # Rows a previous, interrupted move left on the target
+            dst.query(Task).filter(Task.owner_id == user_id).delete(synchronize_session=False)
+            dst.query(ArchivedTask).filter(ArchivedTask.owner_id == user_id).delete(synchronize_session=False)
+            copies = [
+                Task(
+                    id=id_map.get(t.id, t.id),
+                    title=t.title,
+                    description=t.description,
+                    state=t.state,
+                    created_at=t.created_at,
+                    updated_at=t.updated_at,
+                    owner_id=t.owner_id
+                )
+                for t in tasks
+            ]
+            copies += [
+                ArchivedTask(
+                    id=id_map.get(a.id, a.id),
+                    title=a.title,
+                    description=a.description,
+                    state=a.state,
+                    created_at=a.created_at,
+                    updated_at=a.updated_at,
+                    archived_at=a.archived_at,
+                    owner_id=a.owner_id
+                )
+                for a in archived
+            ]
+            dst.add_all(copies)
+            dst.flush()
+            self._sync_sequence(dst)
+            dst.commit()
+
+            try:
+                if self._snapshot(src, user_id) != snapshot:
+                    raise RuntimeError(f"Tasks of user {user_id} changed during the move; try again")
+                entry = directory.get(UserShard, user_id)
+                entry.shard_id = target
+                entry.moving = False
+                entry.assigned_at = datetime.utcnow()
+                directory.commit()
+            except Exception:
+                # Directory still points at the source: drop the copies
+                directory.rollback()
+                dst.query(Task).filter(Task.owner_id == user_id).delete(synchronize_session=False)
+                dst.query(ArchivedTask).filter(ArchivedTask.owner_id == user_id).delete(synchronize_session=False)
+                dst.commit()
+                raise
+
+            src.query(Task).filter(Task.owner_id == user_id).delete(synchronize_session=False)
+            src.query(ArchivedTask).filter(ArchivedTask.owner_id == user_id).delete(synchronize_session=False)
+            src.commit()
+            return {"rows": len(copies), "renumbered": id_map}
+        finally:
+            src.close()
+            dst.close()
+            directory.close()
+
+    def rebalance(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Move every user whose directory shard differs from the ring's choice
+        (e.g. after SHARD_COUNT was raised or lowered), and finish
+        interrupted moves.
+        Returns {user_id: move_user() result}.
+        """
+        directory = self.directory_factory()
+        try:
+            entries = [(e.user_id, e.shard_id, e.moving) for e in directory.query(UserShard).all()]
+        finally:
+            directory.close()
+
+        moved = {}
+        for user_id, shard_id, moving in entries:
+            target = self.ring_shard(user_id)
+            if target != shard_id or moving:
+                moved[user_id] = self.move_user(user_id, target)
+        return moved
+
+    def status(self) -> Dict[int, int]:
+        """Number of users assigned to each shard."""
+        directory = self.directory_factory()
+        try:
+            counts = {shard: 0 for shard in range(self.shard_count)}
+            for (shard_id,) in directory.query(UserShard.shard_id).all():
+                counts[shard_id] = counts.get(shard_id, 0) + 1
+            return counts
+        finally:
+            directory.close()
+
+
+shard_router = ShardRouter(
+    SessionLocal,
+    [engine] + [
+        create_shard_engine(SHARD_URL_TEMPLATE.format(shard=shard))
+        for shard in range(1, SHARD_COUNT)
+    ],
+    url_template=SHARD_URL_TEMPLATE
+)
+
+
+@event.listens_for(Session, "after_flush")
+def refuse_writes_during_moves(session: Session, flush_context) -> None:
+    """
+    Re-check the shard directory inside every task write on a shard.
+
+    After the flush the session holds the shard's write lock, and
+    move_user() takes that lock only after marking the user as moving.
+    A write either commits before the move copies, or sees the flag (or
+    the switched directory) here and is rolled back with a 503, however
+    long ago its request started. The move's own sessions are skipped.
+    """
+    if session.info.get("shard_move"):
+        return
+    owners = {
+        obj.owner_id
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, (Task, ArchivedTask))
+    }
+    if not owners:
+        return
+    shard_id = shard_router.shard_for_bind(session.get_bind())
+    if shard_id is None:
+        return
+    try:
+        for owner_id in owners:
+            shard_router.check_writable(owner_id, shard_id)
+    except UserMovingError:
+        raise user_moving_http_error()
+
+
+# Dependency to get the task DB session for the authenticated user's shard
+def get_shard_db(request: Request, current_user: User = Depends(get_current_user)):
+    try:
+        db = shard_router.session_for_user(current_user.id, write=request.method not in READ_METHODS)
+    except UserMovingError:
+        # Fail fast; writes are checked again when they flush
+        raise user_moving_http_error()
+    except ShardUnavailableError:
+        raise HTTPException(
+            status_code=503,
+            detail="Your tasks are temporarily unavailable. Please try again later."
+        )
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # Shard tooling: python -m app.sharding {status,move,rebalance}
+    parser = argparse.ArgumentParser(description="Manage task database shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="Show users per shard")
+    move = commands.add_parser("move", help="Move one user to another shard")
+    move.add_argument("user_id", type=int)
+    move.add_argument("shard", type=int)
+    commands.add_parser("rebalance", help="Move users to the shard chosen by the hash ring")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    shard_router.create_all()
+    shard_router.backfill_directory()
+
+    if args.command == "status":
+        for shard, users in shard_router.status().items():
+            removed = " (removed, run rebalance)" if shard >= shard_router.shard_count else ""
+            print(f"shard {shard}: {users} user(s){removed}")
+    elif args.command == "move":
+        result = shard_router.move_user(args.user_id, args.shard)
+        print(f"Moved user {args.user_id} to shard {args.shard} ({result['rows']} row(s))")
+        for old_id, new_id in result["renumbered"].items():
+            print(f"  task {old_id} -> {new_id} (id already used on shard {args.shard})")
+    elif args.command == "rebalance":
+        moved = shard_router.rebalance()
+        renumbered = sum(len(result["renumbered"]) for result in moved.values())
+        print(f"Moved {len(moved)} user(s), {sum(r['rows'] for r in moved.values())} row(s), {renumbered} task id(s) renumbered")
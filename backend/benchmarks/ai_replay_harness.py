@@ -0,0 +1,248 @@
+"""
+Offline replay harness for AI intent parsing.
+
+Runs a labeled command corpus through AIService.interpret_command and the
+/api/ai/command dispatch (execute_intent) against a throwaway SQLite
+database, answering model calls from recorded Gemini responses. Reports
+intent accuracy, parse-failure rate, prompt token counts and per-stage
+latency (model, JSON parse, DB resolution) without network access.
+
+Run from the backend directory:
+    python -m benchmarks.ai_replay_harness
+    python -m benchmarks.ai_replay_harness --json --min-accuracy 0.9
+
+The shipped data/ai_recordings.jsonl is a hand-written synthetic fixture
+(entries marked "synthetic": true), not captured Gemini output, so it has
+no model latency or token usage. Record real responses from live Gemini
+(needs GEMINI_API_KEY); they are appended and take precedence:
+    python -m benchmarks.ai_replay_harness --mode record
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.database import Base
+from app.models import User, Task, ArchivedTask
+from app.schemas import TaskCreate, TaskUpdate
+from app.services.ai_service import AIService
+from app.services.ai_recorder import ResponseRecorder, set_recorder, text_hash
+from app.services.task_service import TaskService
+from app.routers.ai import execute_intent
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_CASES = os.path.join(DATA_DIR, "ai_commands.jsonl")
+DEFAULT_RECORDINGS = os.path.join(DATA_DIR, "ai_recordings.jsonl")
+
+# Path through the state machine to reach each seeded state
+SEED_TRANSITIONS = {
+    "Not Started": [],
+    "In Progress": ["In Progress"],
+    "Completed": ["In Progress", "Completed"],
+}
+
+
+def load_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough offline estimate (~4 characters per token for English text)
+    return math.ceil(len(text) / 4)
+
+
+def normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, list):
+        return sorted(normalize(v) for v in value)
+    return value
+
+
+def fields_match(intent: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    return all(normalize(intent.get(key)) == normalize(value) for key, value in expected.items())
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    to_ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "mean_ms": to_ms(sum(values) / len(values)) if values else None,
+        "p50_ms": to_ms(percentile(values, 50)),
+        "p95_ms": to_ms(percentile(values, 95)),
+    }
+
+
+def reset_db(db: Session, user_id: int, seed: List[Dict[str, str]]) -> None:
+    """Empty the task tables and create the case's seed tasks."""
+    db.query(Task).delete()
+    db.query(ArchivedTask).delete()
+    db.commit()
+    for item in seed:
+        task = TaskService.create_task(db, TaskCreate(title=item["title"], description=item.get("description", "")), user_id)
+        for state in SEED_TRANSITIONS[item.get("state", "Not Started")]:
+            TaskService.update_task(db, task.id, TaskUpdate(state=state), user_id)
+
+
+def run_case(db: Session, user: User, case: Dict[str, Any]) -> Dict[str, Any]:
+    reset_db(db, user.id, case.get("seed", []))
+
+    timings: Dict[str, float] = {}
+    intent = AIService.interpret_command(case["command"], timings)
+
+    started = time.perf_counter()
+    response = execute_intent(intent, db, user)
+    timings["db"] = time.perf_counter() - started
+
+    expected = case["expected"]
+    message = intent.get("message", "") if intent.get("action") == "ERROR" else ""
+    return {
+        "command": case["command"],
+        "intent": intent,
+        "response": response,
+        "timings": timings,
+        "action_correct": intent.get("action") == expected.get("action"),
+        "fields_correct": fields_match(intent, expected),
+        "parse_failure": message.startswith("Failed to parse"),
+        "missing_recording": "No recorded response" in message,
+        "success_correct": response["success"] == case.get("expect_success", True),
+        "prompt_tokens_estimated": estimate_tokens(AIService.build_prompt(case["command"])),
+    }
+
+
+def build_report(results: List[Dict[str, Any]], recorder: ResponseRecorder) -> Dict[str, Any]:
+    total = len(results)
+    rate = lambda key: round(sum(1 for r in results if r[key]) / total, 4) if total else None
+
+    current_prompt_hash = text_hash(AIService.SYSTEM_PROMPT)
+    recorded_latency, recorded_prompt_tokens, stale, synthetic = [], [], 0, 0
+    for r in results:
+        if r["missing_recording"]:
+            continue
+        try:
+            entry = recorder.lookup(r["command"])
+        except Exception:
+            continue
+        if entry.get("system_prompt_hash") != current_prompt_hash:
+            stale += 1
+        if entry.get("synthetic"):
+            # Hand-written fixture: no real latency or token usage to report
+            synthetic += 1
+            continue
+        if entry.get("latency") is not None:
+            recorded_latency.append(entry["latency"])
+        if entry.get("usage", {}).get("prompt_tokens"):
+            recorded_prompt_tokens.append(entry["usage"]["prompt_tokens"])
+
+    estimated = [r["prompt_tokens_estimated"] for r in results]
+    return {
+        "cases": total,
+        "intent_accuracy": rate("action_correct"),
+        "field_accuracy": rate("fields_correct"),
+        "dispatch_accuracy": rate("success_correct"),
+        "parse_failure_rate": rate("parse_failure"),
+        "missing_recordings": sum(1 for r in results if r["missing_recording"]),
+        "stale_recordings": stale,
+        "synthetic_recordings": synthetic,
+        "prompt_tokens": {
+            "estimated_mean": round(sum(estimated) / total, 1) if total else None,
+            "system_prompt_estimated": estimate_tokens(AIService.SYSTEM_PROMPT),
+            "recorded_mean": round(sum(recorded_prompt_tokens) / len(recorded_prompt_tokens), 1) if recorded_prompt_tokens else None,
+        },
+        "latency": {
+            stage: latency_summary([r["timings"][stage] for r in results if stage in r["timings"]])
+            for stage in ("model", "parse", "db")
+        },
+        "recorded_model_latency": latency_summary(recorded_latency),
+        "failures": [
+            {"command": r["command"], "intent": r["intent"], "message": r["response"]["message"]}
+            for r in results
+            if not (r["action_correct"] and r["fields_correct"] and r["success_correct"])
+        ],
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"Cases:               {report['cases']}")
+    print(f"Intent accuracy:     {report['intent_accuracy']:.1%}")
+    print(f"Field accuracy:      {report['field_accuracy']:.1%}")
+    print(f"Dispatch accuracy:   {report['dispatch_accuracy']:.1%}")
+    print(f"Parse failure rate:  {report['parse_failure_rate']:.1%}")
+    print(f"Missing recordings:  {report['missing_recordings']}")
+    print(f"Stale recordings:    {report['stale_recordings']} (recorded with a different SYSTEM_PROMPT)")
+    print(f"Synthetic:           {report['synthetic_recordings']} (hand-written fixtures, no recorded latency/usage)")
+    tokens = report["prompt_tokens"]
+    recorded_mean = tokens["recorded_mean"] if tokens["recorded_mean"] is not None else "n/a"
+    print(f"Prompt tokens:       ~{tokens['estimated_mean']} per command "
+          f"(system prompt ~{tokens['system_prompt_estimated']}, recorded mean {recorded_mean})")
+    print("Latency (ms)         mean      p50      p95")
+    stages = dict(report["latency"])
+    if report["recorded_model_latency"]["mean_ms"] is not None:
+        stages["recorded_model"] = report["recorded_model_latency"]
+    for stage, summary in stages.items():
+        cells = [f"{summary[k]:>8.3f}" if summary[k] is not None else f"{'-':>8}" for k in ("mean_ms", "p50_ms", "p95_ms")]
+        print(f"  {stage:<16} {' '.join(cells)}")
+    for failure in report["failures"]:
+        print(f"FAIL {failure['command']!r}: {json.dumps(failure['intent'])} -> {failure['message']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=DEFAULT_CASES, help="labeled command corpus (JSONL)")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS, help="recorded responses (JSONL)")
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--min-accuracy", type=float, help="exit 1 if intent accuracy is lower")
+    parser.add_argument("--max-parse-failure-rate", type=float, help="exit 1 if parse-failure rate is higher")
+    args = parser.parse_args()
+
+    recorder = ResponseRecorder(mode=args.mode, path=args.recordings)
+    set_recorder(recorder)
+    cases = load_jsonl(args.cases)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(directory, 'replay.db')}",
+            connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        try:
+            user = User(username="replay", email="replay@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+            results = [run_case(db, user, case) for case in cases]
+        finally:
+            db.close()
+            engine.dispose()
+
+    report = build_report(results, recorder)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+    failed = False
+    if args.min_accuracy is not None and (report["intent_accuracy"] or 0) < args.min_accuracy:
+        print(f"Intent accuracy below {args.min_accuracy:.1%}", file=sys.stderr)
+        failed = True
+    if args.max_parse_failure_rate is not None and (report["parse_failure_rate"] or 0) > args.max_parse_failure_rate:
+        print(f"Parse failure rate above {args.max_parse_failure_rate:.1%}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
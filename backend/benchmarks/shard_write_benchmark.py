@@ -0,0 +1,106 @@
+"""
+Write throughput vs. shard count.
+
+Creates throwaway SQLite shard files in a temp directory, then has many
+concurrent "users" create and update tasks through TaskService (one commit
+per write, like the API) and reports writes/second for each shard count.
+Users are spread over several worker processes, like uvicorn workers, so
+the single-writer lock per database file is the shared bottleneck. Scaling
+needs more than one CPU core and real disk fsyncs to show.
+
+Run from the backend directory:
+    python -m benchmarks.shard_write_benchmark --shards 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User
+from app.schemas import TaskCreate, TaskUpdate
+from app.services.task_service import TaskService
+from app.sharding import ShardRouter, create_shard_engine
+
+
+def open_router(directory: str, shard_count: int) -> ShardRouter:
+    main_engine = create_shard_engine(f"sqlite:///{os.path.join(directory, 'main.db')}")
+    engines = [main_engine] + [
+        create_shard_engine(f"sqlite:///{os.path.join(directory, f'shard_{n}.db')}")
+        for n in range(1, shard_count)
+    ]
+    return ShardRouter(sessionmaker(bind=main_engine), engines)
+
+
+def setup(directory: str, shard_count: int, user_count: int) -> None:
+    router = open_router(directory, shard_count)
+    Base.metadata.create_all(bind=router.engines[0])
+    router.create_all()
+
+    db = router.directory_factory()
+    db.add_all([
+        User(id=n, username=f"bench{n}", email=f"bench{n}@example.com", hashed_password="x")
+        for n in range(1, user_count + 1)
+    ])
+    db.commit()
+    db.close()
+    # Resolve shard placement up front so only task writes are timed
+    for user_id in range(1, user_count + 1):
+        router.get_shard(user_id)
+    for engine in router.engines:
+        engine.dispose()
+
+
+def user_workload(router: ShardRouter, user_id: int, writes: int) -> int:
+    db = router.session_for_user(user_id)
+    try:
+        done = 0
+        while done < writes:
+            task = TaskService.create_task(db, TaskCreate(title=f"task {done}"), user_id)
+            done += 1
+            if done < writes:
+                TaskService.update_task(db, task.id, TaskUpdate(state="In Progress"), user_id)
+                done += 1
+        return done
+    finally:
+        db.close()
+
+
+def worker(directory: str, shard_count: int, user_ids: list, writes_per_user: int) -> int:
+    """One worker process: its users write concurrently from threads."""
+    router = open_router(directory, shard_count)
+    with ThreadPoolExecutor(max_workers=len(user_ids)) as pool:
+        return sum(pool.map(lambda user_id: user_workload(router, user_id, writes_per_user), user_ids))
+
+
+def run(shard_count: int, users: int, writes_per_user: int, workers: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        setup(directory, shard_count, users)
+        chunks = [list(range(1 + n, users + 1, workers)) for n in range(workers)]
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(worker, directory, shard_count, chunk, writes_per_user)
+                for chunk in chunks if chunk
+            ]
+            total = sum(f.result() for f in futures)
+        elapsed = time.perf_counter() - started
+        return total / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=50, help="writes per user")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'shards':>6}  {'writes/s':>10}  {'speedup':>7}")
+    for shard_count in args.shards:
+        rate = run(shard_count, args.users, args.writes, args.workers)
+        baseline = baseline or rate
+        print(f"{shard_count:>6}  {rate:>10.0f}  {rate / baseline:>6.2f}x")
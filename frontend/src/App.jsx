@@ -11,6 +11,7 @@ function App() {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [user, setUser] = useState(null);
   const [tasks, setTasks] = useState([]);
+  const [archivedTasks, setArchivedTasks] = useState([]);
   const [filter, setFilter] = useState('All');
   const [loading, setLoading] = useState(true);
 
@@ -46,6 +47,29 @@ function App() {
     }
   };
 
+  const loadArchivedTasks = async () => {
+    try {
+      const response = await tasksAPI.getArchivedTasks();
+      setArchivedTasks(response.data);
+    } catch (err) {
+      console.error('Failed to load archived tasks:', err);
+    }
+  };
+
+  const refreshTasks = () => {
+    loadTasks();
+    if (filter === 'Archived') {
+      loadArchivedTasks();
+    }
+  };
+
+  const handleFilterChange = (value) => {
+    setFilter(value);
+    if (value === 'Archived') {
+      loadArchivedTasks();
+    }
+  };
+
   const handleLogin = () => {
     setIsAuthenticated(true);
     checkAuth();
@@ -56,6 +80,7 @@ function App() {
     setIsAuthenticated(false);
     setUser(null);
     setTasks([]);
+    setArchivedTasks([]);
   };
 
   const handleCreateTask = async (title, description) => {
@@ -79,8 +104,13 @@ function App() {
   const handleDeleteTask = async (id) => {
     if (confirm('Are you sure you want to delete this task?')) {
       try {
-        await tasksAPI.deleteTask(id);
-        loadTasks();
+        if (filter === 'Archived') {
+          await tasksAPI.deleteArchivedTask(id);
+          loadArchivedTasks();
+        } else {
+          await tasksAPI.deleteTask(id);
+          loadTasks();
+        }
       } catch (err) {
         alert(err.response?.data?.detail || 'Failed to delete task');
       }
@@ -145,17 +175,17 @@ function App() {
             <TaskStats tasks={tasks} />
             <TaskForm onSubmit={handleCreateTask} />
             <TaskList
-              tasks={tasks}
+              tasks={filter === 'Archived' ? archivedTasks : tasks}
               onUpdate={handleUpdateTask}
               onDelete={handleDeleteTask}
               filter={filter}
-              onFilterChange={setFilter}
+              onFilterChange={handleFilterChange}
             />
           </div>
 
           {/* Right Side - AI Chat */}
           <div className="lg:sticky lg:top-24 h-fit">
-            <AIChat onTasksChange={loadTasks} />
+            <AIChat onTasksChange={refreshTasks} />
           </div>
         </div>
       </main>
@@ -1,10 +1,11 @@
 import TaskCard from './TaskCard';
 import { Filter } from 'lucide-react';
 
-const STATES = ['All', 'Not Started', 'In Progress', 'Completed'];
+const STATES = ['All', 'Not Started', 'In Progress', 'Completed', 'Archived'];
 
 export default function TaskList({ tasks, onUpdate, onDelete, filter, onFilterChange }) {
-  const filteredTasks = filter === 'All' 
+  // Archived tasks are loaded separately and passed in as tasks
+  const filteredTasks = filter === 'All' || filter === 'Archived'
     ? tasks 
     : tasks.filter(task => task.state === filter);
 
@@ -37,7 +38,9 @@ export default function TaskList({ tasks, onUpdate, onDelete, filter, onFilterCh
           <p className="text-gray-600 text-lg">
             {filter === 'All' 
               ? 'No tasks yet. Create one to get started!' 
-              : `No tasks in "${filter}" state.`}
+              : filter === 'Archived'
+                ? 'No archived tasks.'
+                : `No tasks in "${filter}" state.`}
           </p>
         </div>
       ) : (
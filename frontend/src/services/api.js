@@ -35,6 +35,8 @@ export const tasksAPI = {
   
   getTasksByState: (state) => api.get('/tasks', { params: { state } }),
   
+  getArchivedTasks: () => api.get('/tasks/archive'),
+  
   getTask: (id) => api.get(`/tasks/${id}`),
   
   createTask: (title, description = '') => 
@@ -43,6 +45,8 @@ export const tasksAPI = {
   updateTask: (id, data) => api.put(`/tasks/${id}`, data),
   
   deleteTask: (id) => api.delete(`/tasks/${id}`),
+  
+  deleteArchivedTask: (id) => api.delete(`/tasks/archive/${id}`),
 };
 
 // AI API